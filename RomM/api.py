@@ -1,21 +1,99 @@
 import base64
+import hashlib
+import io
 import json
-import math
+import logging
 import os
-import re
+import shutil
+import threading
 import zipfile
-from typing import Tuple
-from urllib.error import HTTPError, URLError
-from urllib.parse import quote
-from urllib.request import Request, urlopen
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import attrgetter
+from typing import IO, Any, Callable, Optional, Tuple
+from urllib.parse import quote, urlencode
 
 import platform_maps
+import requests
+import urllib3
 from filesystem import Filesystem
-from models import Collection, Platform, Rom
+from models import Collection, Platform, Rom, SaveData, StateSave
 from PIL import Image
+from requests.adapters import HTTPAdapter, Retry
+from requests.exceptions import HTTPError, RequestException
 from status import Status, View
 import time
 
+try:
+    # Optional "speedups" extra, several times faster on large JSON bodies
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+logger = logging.getLogger(__name__)
+
+# Characters that are not allowed in file names on the device
+_SANITIZE_TABLE = str.maketrans({c: "_" for c in '\\/*?:"<>|\t\n\r\b'})
+
+# JSON documents kept in memory, the ROM lists of a large library are big
+_JSON_CACHE_SIZE = 8
+
+# Values used for the save/state fields the server leaves out, None otherwise
+_ASSET_DEFAULTS = {
+    "file_name": "",
+    "file_name_no_tags": "",
+    "file_name_no_ext": "",
+    "file_extension": "",
+    "file_path": "",
+    "file_size_bytes": 0,
+    "full_path": "",
+    "download_path": "",
+    "missing_from_fs": False,
+    "created_at": "",
+    "updated_at": "",
+}
+
+
+@lru_cache(maxsize=512)
+def _resolve_platform_folder(platform_slug: str) -> str:
+    """Lowercase ES folder name of a lowercase platform slug."""
+    mapped_folder, _icon_file = platform_maps.ES_FOLDER_MAP.get(
+        platform_slug, (platform_slug, platform_slug)
+    )
+    return mapped_folder.lower()
+
+
+def _build_asset(cls: Any, data: dict) -> Any:
+    """Build a SaveData or StateSave from the JSON object of the server."""
+    get = data.get
+    return cls._make([get(field, _ASSET_DEFAULTS.get(field)) for field in cls._fields])
+
+
+class _DownloadAborted(Exception):
+    """Raised while writing a download once the user aborted it."""
+
+
+class _ProgressWriter:
+    """File wrapper for copyfileobj that reports progress and stops on abort."""
+
+    def __init__(
+        self,
+        file: IO[bytes],
+        abort: threading.Event,
+        on_write: Callable[[int], None],
+    ) -> None:
+        self._file = file
+        self._abort = abort
+        self._on_write = on_write
+
+    def write(self, data: bytes) -> int:
+        if self._abort.is_set():
+            raise _DownloadAborted
+        written = self._file.write(data)
+        self._on_write(len(data))
+        return written
+
 
 class API:
     _platforms_endpoint = "api/platforms"
@@ -29,6 +107,15 @@ class API:
     _auth_token_endpoint = "api/auth/token"
     _states_endpoint = "api/states"
 
+    # Number of platform icons downloaded in parallel, kept low to spare the server
+    _icon_workers = 5
+    # Number of ROMs downloaded in parallel
+    _download_workers = 4
+    # Icons missing on the server are asked for again after a day
+    _missing_icon_ttl = 24 * 60 * 60
+    # Refresh the access token a bit before it expires
+    _token_expiry_margin = 60
+
     def __init__(self):
         self.status = Status()
         self.file_system = Filesystem()
@@ -42,256 +129,359 @@ class API:
         self._exclude_collections = set(self._getenv_list("EXCLUDE_COLLECTIONS"))
         self._collection_type = os.getenv("COLLECTION_TYPE", "collection")
 
+        # Endpoint URLs only depend on the host, build them once
+        base_url = self.host.rstrip("/")
+        self._platforms_url = f"{base_url}/{self._platforms_endpoint}"
+        self._platform_icons_url = f"{base_url}/{self._platform_icon_url}"
+        self._collections_url = f"{base_url}/{self._collections_endpoint}"
+        self._virtual_collections_url = (
+            f"{base_url}/{self._virtual_collections_endpoint}?"
+            + urlencode({"type": self._collection_type})
+        )
+        self._roms_url = f"{base_url}/{self._roms_endpoint}"
+        self._user_me_url = f"{base_url}/{self._user_me_endpoint}"
+        self._profile_pictures_url = f"{base_url}/{self._user_profile_picture_url}"
+        self._saves_url = f"{base_url}/{self._saves_endpoint}"
+        self._states_url = f"{base_url}/{self._states_endpoint}"
+        self._auth_token_url = f"{base_url}/{self._auth_token_endpoint}"
+        self._user_assets_url = f"{base_url}/api/raw/assets/users/{self.username}"
+
         # セーブデータ関連
         self.access_token = None
         self.refresh_token = None
         self.token_expires_at = None
+        # Auth scheme the saves API accepted last ("basic" or "bearer")
+        self._preferred_auth: Optional[str] = None
+
+        # Last JSON documents received per URL, with their ETag and Last-Modified,
+        # least recently used first
+        self._json_cache: OrderedDict[str, Tuple[Optional[str], Optional[str], Any]] = (
+            OrderedDict()
+        )
+        self._json_cache_lock = threading.Lock()
+        # Writes the documents to the disk cache one after the other
+        self._cache_writer = ThreadPoolExecutor(max_workers=1)
+        # Both caches are also kept on disk so they survive restarts
+        self._cache_dir = os.path.join(self.file_system.resources_path, "cache")
+        self._missing_icons: dict[str, float] = (
+            self._read_cache_file("missing_icons") or {}
+        )
+        # 保存済みのトークンを再利用する
+        self._token_lock = threading.Lock()
+        self._load_token()
+
+        # Guards the download progress shared by the download workers
+        self._download_lock = threading.Lock()
+        self._download_total_bytes = 1
+        self._last_progress_report = 0.0
+        # Multi-file ROMs being extracted by the download workers, oldest first
+        self._extracting_roms: list[Rom] = []
+        # Directories already created during this session
+        self._created_dirs: set[str] = set()
 
         if self.username and self.password:
             credentials = f"{self.username}:{self.password}"
             auth_token = base64.b64encode(credentials.encode("utf-8")).decode("utf-8")
             self.headers = {"Authorization": f"Basic {auth_token}"}
 
+        # Keep-alive session shared by every request to the RomM host
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        # Retry idempotent requests when the server is briefly unavailable.
+        # Connection errors and timeouts are not retried, an unreachable host
+        # would otherwise keep the caller waiting for several timeouts.
+        # A Retry-After header is ignored, it may ask for hours of waiting
+        retry = Retry(
+            total=3,
+            connect=0,
+            read=0,
+            other=0,
+            backoff_factor=0.3,
+            status_forcelist=[502, 503, 504],
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retry)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
     @staticmethod
     def _getenv_list(key: str) -> list[str]:
         value = os.getenv(key)
         return [item.strip() for item in value.split(",")] if value is not None else []
 
+    # Many ROMs share the same size (cartridge dumps), reuse the result
     @staticmethod
+    @lru_cache(maxsize=1024)
     def _human_readable_size(size_bytes: int) -> Tuple[float, str]:
-        if size_bytes == 0:
+        if size_bytes <= 0:
             return 0, "B"
         size_name = ("B", "KB", "MB", "GB")
-        i = int(math.floor(math.log(size_bytes, 1024)))
-        p = math.pow(1024, i)
-        s = round(size_bytes / p, 2)
+        # Each unit is 2**10 times the previous one
+        i = min(len(size_name) - 1, (size_bytes.bit_length() - 1) // 10)
+        s = round(size_bytes / (1 << (i * 10)), 2)
         return (s, size_name[i])
 
+    def _ensure_dir(self, path: str) -> None:
+        if path not in self._created_dirs:
+            os.makedirs(path, exist_ok=True)
+            self._created_dirs.add(path)
+
+    def _read_cache_file(self, key: str) -> Optional[Any]:
+        try:
+            with open(os.path.join(self._cache_dir, f"{key}.json"), "rb") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache_file(self, key: str, data: Any) -> None:
+        path = os.path.join(self._cache_dir, f"{key}.json")
+        # Write aside and swap, a crash never leaves a truncated cache file
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            self._ensure_dir(self._cache_dir)
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Failed to write cache %s: %s", path, e)
+
     def _sanitize_filename(self, filename: str) -> str:
+        # Plain file names (the common case) need no split and join
+        if filename and os.sep not in filename:
+            return filename.translate(_SANITIZE_TABLE)
         path_parts = os.path.normpath(filename).split(os.sep)
-        sanitized_parts = []
-
-        for _i, part in enumerate(path_parts):
-            sanitized = re.sub(r'[\\/*?:"<>|\t\n\r\b]', "_", part)
-            sanitized_parts.append(sanitized)
+        return os.path.join(*(part.translate(_SANITIZE_TABLE) for part in path_parts))
 
-        return os.path.join(*sanitized_parts)
+    @staticmethod
+    def _save_resized_image(data: bytes, path: str, size: Tuple[int, int]) -> None:
+        """Decode an image from memory, shrink it to fit size and write it once."""
+        image = Image.open(io.BytesIO(data))
+        # Already the right size, keep the file as served
+        if image.size == size:
+            with open(path, "wb") as f:
+                f.write(data)
+            return
+        # ICO files embed several sizes, start from the smallest one that still fits
+        sizes = image.info.get("sizes")
+        if sizes:
+            larger = [s for s in sizes if s[0] >= size[0] and s[1] >= size[1]]
+            image.size = min(larger) if larger else max(sizes)
+        image.thumbnail(size, Image.Resampling.BILINEAR)
+        # ICO only keeps the frames listed in sizes, keep the resized one
+        image.save(path, sizes=[image.size])
 
     def _fetch_user_profile_picture(self, avatar_path: str) -> None:
         fs_extension = avatar_path.split(".")[-1]
-        try:
-            # URLエンコーディングを追加してスペース文字を処理
-            encoded_avatar_path = quote(avatar_path)
-            request = Request(
-                f"{self.host}/{self._user_profile_picture_url}/{encoded_avatar_path}",
-                headers=self.headers,
-            )
-        except ValueError as e:
-            print(e)
-            self.status.valid_host = False
-            self.status.valid_credentials = False
-            return
-        try:
-            if request.type not in ("http", "https"):
-                self.status.valid_host = False
-                self.status.valid_credentials = False
-                return
-            response = urlopen(request, timeout=60)  # trunk-ignore(bandit/B310)
-        except HTTPError as e:
-            print(e)
-            if e.code == 403:
-                self.status.valid_host = True
-                self.status.valid_credentials = False
-                return
-            else:
-                raise
-        except URLError as e:
-            print(e)
-            self.status.valid_host = False
-            self.status.valid_credentials = False
+        # URLエンコーディングを追加してスペース文字を処理
+        encoded_avatar_path = quote(avatar_path)
+        response = self._http_get(f"{self._profile_pictures_url}/{encoded_avatar_path}")
+        if response is None:
             return
         if not os.path.exists(self.file_system.resources_path):
             os.makedirs(self.file_system.resources_path)
-        self.status.profile_pic_path = (
+        profile_pic_path = (
             f"{self.file_system.resources_path}/{self.username}.{fs_extension}"
         )
-        with open(self.status.profile_pic_path, "wb") as f:
-            f.write(response.read())
-        icon = Image.open(self.status.profile_pic_path)
-        icon = icon.resize((26, 26))
-        icon.save(self.status.profile_pic_path)
+        self._save_resized_image(response.content, profile_pic_path, (26, 26))
+        self.status.profile_pic_path = profile_pic_path
         self.status.valid_host = True
         self.status.valid_credentials = True
 
-    def fetch_me(self) -> None:
+    def _http_get(
+        self, url: str, headers: Optional[dict] = None, timeout: int = 60
+    ) -> Optional[requests.Response]:
+        """
+        GET a resource from the RomM host.
+        Returns None and flags the host or the credentials as invalid
+        when the request fails, other HTTP errors are raised to the caller.
+        """
         try:
-            request = Request(
-                f"{self.host}/{self._user_me_endpoint}", headers=self.headers
-            )
+            response = self._session.get(url, headers=headers, timeout=timeout)
+            response.raise_for_status()
         except ValueError as e:
-            print(e)
+            logger.error("%s", e)
             self.status.valid_host = False
             self.status.valid_credentials = False
-            return
-        try:
-            if request.type not in ("http", "https"):
-                self.status.valid_host = False
-                self.status.valid_credentials = False
-                return
-            response = urlopen(request, timeout=60)  # trunk-ignore(bandit/B310)
+            return None
         except HTTPError as e:
-            print(e)
-            if e.code == 403:
+            logger.error("HTTP Error in fetching %s: %s", url, e)
+            if e.response.status_code == 403:
                 self.status.valid_host = True
                 self.status.valid_credentials = False
-                return
+                return None
             else:
                 raise
-        except URLError as e:
-            print(e)
+        except RequestException as e:
+            logger.error("%s", e)
             self.status.valid_host = False
             self.status.valid_credentials = False
+            return None
+        return response
+
+    @staticmethod
+    def _cache_key(url: str) -> str:
+        # Only names the cache file, not a security boundary
+        return hashlib.sha1(url.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+    def _cached_json(
+        self, url: str
+    ) -> Optional[Tuple[Optional[str], Optional[str], Any]]:
+        """
+        ETag, Last-Modified and document last received from url.
+        The document is None when it is no longer in memory,
+        it is then only read from disk on 304 Not Modified.
+        """
+        with self._json_cache_lock:
+            cached = self._json_cache.get(url)
+            if cached is not None:
+                self._json_cache.move_to_end(url)
+                return cached
+        stored = self._read_cache_file(f"{self._cache_key(url)}.validators")
+        if isinstance(stored, list) and len(stored) == 2:
+            return (stored[0], stored[1], None)
+        return None
+
+    def _remember_json(
+        self, url: str, cached: Tuple[Optional[str], Optional[str], Any]
+    ) -> None:
+        with self._json_cache_lock:
+            self._json_cache[url] = cached
+            self._json_cache.move_to_end(url)
+            if len(self._json_cache) > _JSON_CACHE_SIZE:
+                self._json_cache.popitem(last=False)
+
+    def _store_json(
+        self, url: str, etag: Optional[str], last_modified: Optional[str], data: Any
+    ) -> None:
+        key = self._cache_key(url)
+        # Document first, the validators never describe an older document
+        self._write_cache_file(key, data)
+        self._write_cache_file(f"{key}.validators", [etag, last_modified])
+
+    @staticmethod
+    def _conditional_headers(
+        cached: Optional[Tuple[Optional[str], Optional[str], Any]],
+    ) -> dict:
+        headers = {}
+        if cached:
+            etag, last_modified, _data = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def _get_json(
+        self, url: str, get: Callable[[dict], Optional[requests.Response]]
+    ) -> Optional[Any]:
+        """
+        GET a JSON document through get(headers) with the validators of the
+        cached copy, unchanged documents are served from the cache.
+        """
+        cached = self._cached_json(url)
+        response = get(self._conditional_headers(cached))
+        if response is None:
+            return None
+        if response.status_code == 304 and cached:
+            etag, last_modified, data = cached
+            if data is None:
+                data = self._read_cache_file(self._cache_key(url))
+            if data is not None:
+                self._remember_json(url, (etag, last_modified, data))
+                return data
+            # The stored document is gone, ask for the full one
+            response = get({})
+            if response is None:
+                return None
+        # Parse the raw UTF-8 body, skip the encoding guess of requests
+        data = _json_loads(response.content)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._remember_json(url, (etag, last_modified, data))
+            # Dumping a large ROM list to the SD card takes a while,
+            # the caller gets the document without waiting for it
+            self._cache_writer.submit(self._store_json, url, etag, last_modified, data)
+        return data
+
+    def _http_get_json(self, url: str, timeout: int = 60) -> Optional[Any]:
+        """
+        GET a JSON document from the RomM host.
+        Returns None and flags the host or the credentials as invalid
+        when the request fails, unchanged documents are served from the cache.
+        """
+        return self._get_json(
+            url, lambda headers: self._http_get(url, headers=headers, timeout=timeout)
+        )
+
+    def fetch_me(self) -> None:
+        me = self._http_get_json(self._user_me_url)
+        if me is None:
             return
-        me = json.loads(response.read().decode("utf-8"))
         self.status.me = me
         if me["avatar_path"]:
             self._fetch_user_profile_picture(me["avatar_path"])
         self.status.me_ready.set()
 
     def _fetch_platform_icon(self, platform_slug) -> None:
+        mapped_slug, icon_filename = platform_maps.ES_FOLDER_MAP.get(
+            platform_slug.lower(), (platform_slug, platform_slug)
+        )
+        icon_url = f"{self._platform_icons_url}/{icon_filename}.ico"
         try:
-            mapped_slug, icon_filename = platform_maps.ES_FOLDER_MAP.get(
-                platform_slug.lower(), (platform_slug, platform_slug)
-            )
-            icon_url = f"{self.host}/{self._platform_icon_url}/{icon_filename}.ico"
-            request = Request(
-                f"{self.host}/{self._platform_icon_url}/{icon_filename}.ico",
-                headers=self.headers,
-            )
-        except ValueError as e:
-            print(e)
-            self.status.valid_host = False
-            self.status.valid_credentials = False
-            return
-
-        try:
-            if request.type not in ("http", "https"):
-                self.status.valid_host = False
-                self.status.valid_credentials = False
-                return
-            response = urlopen(request, timeout=60)  # trunk-ignore(bandit/B310)
+            response = self._http_get(icon_url)
         except HTTPError as e:
-            print(e)
-            if e.code == 403:
-                self.status.valid_host = True
-                self.status.valid_credentials = False
-                return
             # Icon is missing on the server
-            elif e.code == 404:
-                self.status.valid_host = True
-                self.status.valid_credentials = True
-                print(f"Requested icon not found: {icon_url}")
-                return
-            else:
+            if e.response.status_code != 404:
                 raise
-        except URLError as e:
-            print(e)
-            self.status.valid_host = False
-            self.status.valid_credentials = False
+            self.status.valid_host = True
+            self.status.valid_credentials = True
+            logger.warning("Requested icon not found: %s", icon_url)
+            self._missing_icons[platform_slug] = time.time()
+            return
+        if response is None:
             return
 
-        self.file_system.resources_path = os.getcwd() + "/resources"
-        if not os.path.exists(self.file_system.resources_path):
-            os.makedirs(self.file_system.resources_path)
-
-        with open(f"{self.file_system.resources_path}/{platform_slug}.ico", "wb") as f:
-            f.write(response.read())
-
-        icon = Image.open(f"{self.file_system.resources_path}/{platform_slug}.ico")
-        icon = icon.resize((30, 30))
-        icon.save(f"{self.file_system.resources_path}/{platform_slug}.ico")
+        self._save_resized_image(
+            response.content,
+            f"{self.file_system.resources_path}/{platform_slug}.ico",
+            (30, 30),
+        )
+        self._missing_icons.pop(platform_slug, None)
         self.status.valid_host = True
         self.status.valid_credentials = True
 
     def fetch_platforms(self) -> None:
-        try:
-            request = Request(
-                f"{self.host}/{self._platforms_endpoint}", headers=self.headers
-            )
-        except ValueError:
+        platforms = self._http_get_json(self._platforms_url)
+        if platforms is None:
             self.status.platforms = []
-            self.status.valid_host = False
-            self.status.valid_credentials = False
             return
-        try:
-            if request.type not in ("http", "https"):
-                self.status.platforms = []
-                self.status.valid_host = False
-                self.status.valid_credentials = False
-                return
-            response = urlopen(request, timeout=60)  # trunk-ignore(bandit/B310)
-        except HTTPError as e:
-            print(f"HTTP Error in fetching platforms: {e}")
-            if e.code == 403:
-                self.status.platforms = []
-                self.status.valid_host = True
-                self.status.valid_credentials = False
-                return
-            else:
-                raise
-        except URLError:
-            print("URLError in fetching platforms")
-            self.status.platforms = []
-            self.status.valid_host = False
-            self.status.valid_credentials = False
-            return
-        platforms = json.loads(response.read().decode("utf-8"))
         _platforms: list[Platform] = []
 
         # Get the list of subfolders in the ROMs directory for PM filtering
-        roms_subfolders = set()
+        roms_subfolders: frozenset[str] = frozenset()
         if not self.file_system.is_muos and not self.file_system.is_spruceos:
-            roms_path = self.file_system.get_roms_storage_path()
-            print(f"ROMs path: {roms_path}")
-            if os.path.exists(roms_path):
-                roms_subfolders = {
-                    d.lower()
-                    for d in os.listdir(roms_path)
-                    if os.path.isdir(os.path.join(roms_path, d))
-                }
+            logger.debug("ROMs path: %s", self.file_system.get_roms_storage_path())
+            roms_subfolders = self.file_system.get_roms_subfolders()
+
+        # List the icons once instead of checking each one on the SD card
+        try:
+            existing_icons = set(os.listdir(self.file_system.resources_path))
+        except FileNotFoundError:
+            os.makedirs(self.file_system.resources_path, exist_ok=True)
+            existing_icons = set()
 
+        missing_icons: list[str] = []
+        now = time.time()
         for platform in platforms:
             if platform["rom_count"] > 0:
                 platform_slug = platform["slug"].lower()
                 if (
-                    platform_maps._env_maps
-                    and platform_slug in platform_maps._env_platforms
-                    and platform_slug not in self._exclude_platforms
+                    platform_slug in self._exclude_platforms
+                    or not self._is_platform_supported(platform_slug, roms_subfolders)
                 ):
-                    # A custom map from the .env was found, no need to check defaults
-                    pass
-                elif self.file_system.is_muos:
-                    if (
-                        platform_slug not in platform_maps.MUOS_SUPPORTED_PLATFORMS
-                        or platform_slug in self._exclude_platforms
-                    ):
-                        continue
-                elif self.file_system.is_spruceos:
-                    if (
-                        platform_slug not in platform_maps.SPRUCEOS_SUPPORTED_PLATFORMS
-                        or platform_slug in self._exclude_platforms
-                    ):
-                        continue
-                else:
-                    # Map the slug to the folder name for non-muOS
-                    mapped_folder, icon_file = platform_maps.ES_FOLDER_MAP.get(
-                        platform_slug.lower(), (platform_slug, platform_slug)
-                    )
-                    if (
-                        mapped_folder.lower() not in roms_subfolders
-                        or platform_slug in self._exclude_platforms
-                    ):
-                        continue
+                    continue
 
                 _platforms.append(
                     Platform(
@@ -302,62 +492,40 @@ class API:
                     )
                 )
 
-                self.file_system.resources_path = os.getcwd() + "/resources"
-                icon_path = f"{self.file_system.resources_path}/{platform['slug']}.ico"
-                if not os.path.exists(icon_path):
-                    self._fetch_platform_icon(platform["slug"])
+                if (
+                    f"{platform['slug']}.ico" not in existing_icons
+                    and now - self._missing_icons.get(platform["slug"], 0)
+                    > self._missing_icon_ttl
+                ):
+                    missing_icons.append(platform["slug"])
+
+        # Icons are independent of each other, fetch them concurrently
+        if missing_icons:
+            with ThreadPoolExecutor(max_workers=self._icon_workers) as executor:
+                list(executor.map(self._fetch_platform_icon, missing_icons))
+            self._write_cache_file("missing_icons", self._missing_icons)
 
         self.status.platforms = _platforms
-        print(f"Fetched {len(_platforms)} platforms")
+        logger.info("Fetched %s platforms", len(_platforms))
         self.status.valid_host = True
         self.status.valid_credentials = True
         self.status.platforms_ready.set()
 
     def fetch_collections(self) -> None:
-        try:
-            collections_request = Request(
-                f"{self.host}/{self._collections_endpoint}", headers=self.headers
+        # Both lists are independent, request them in parallel
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            collections_future = executor.submit(
+                self._http_get_json, self._collections_url
             )
-            v_collections_request = Request(
-                f"{self.host}/{self._virtual_collections_endpoint}?type={self._collection_type}",
-                headers=self.headers,
+            v_collections_future = executor.submit(
+                self._http_get_json, self._virtual_collections_url
             )
-        except ValueError:
+            collections = collections_future.result()
+            v_collections = v_collections_future.result()
+        if collections is None or v_collections is None:
             self.status.collections = []
-            self.status.valid_host = False
-            self.status.valid_credentials = False
             return
 
-        try:
-            if collections_request.type not in ("http", "https"):
-                self.status.collections = []
-                self.status.valid_host = False
-                self.status.valid_credentials = False
-                return
-
-            collections_response = urlopen(  # trunk-ignore(bandit/B310)
-                collections_request, timeout=60
-            )
-            v_collections_response = urlopen(  # trunk-ignore(bandit/B310)
-                v_collections_request, timeout=60
-            )
-        except HTTPError as e:
-            if e.code == 403:
-                self.status.collections = []
-                self.status.valid_host = True
-                self.status.valid_credentials = False
-                return
-            else:
-                raise
-        except URLError:
-            self.status.collections = []
-            self.status.valid_host = False
-            self.status.valid_credentials = False
-            return
-
-        collections = json.loads(collections_response.read().decode("utf-8"))
-        v_collections = json.loads(v_collections_response.read().decode("utf-8"))
-
         if isinstance(collections, dict):
             collections = collections["items"]
         if isinstance(v_collections, dict):
@@ -404,6 +572,20 @@ class API:
         self.status.valid_credentials = True
         self.status.collections_ready.set()
 
+    def _is_platform_supported(
+        self, platform_slug: str, roms_subfolders: frozenset[str]
+    ) -> bool:
+        """Whether ROMs of a lowercase platform slug can be stored on this device."""
+        # A custom map from the .env was found, no need to check defaults
+        if platform_maps._env_maps and platform_slug in platform_maps._env_platforms:
+            return True
+        if self.file_system.is_muos:
+            return platform_slug in platform_maps.MUOS_SUPPORTED_PLATFORMS
+        if self.file_system.is_spruceos:
+            return platform_slug in platform_maps.SPRUCEOS_SUPPORTED_PLATFORMS
+        # Map the slug to the folder name for non-muOS
+        return _resolve_platform_folder(platform_slug) in roms_subfolders
+
     def fetch_roms(self) -> None:
         if self.status.selected_platform:
             view = View.PLATFORMS
@@ -420,91 +602,56 @@ class API:
         else:
             return
 
-        try:
-            request = Request(
-                f"{self.host}/{self._roms_endpoint}?{view}_id={id}&order_by=name&order_dir=asc&limit=10000",
-                headers=self.headers,
-            )
-        except ValueError:
-            self.status.roms = []
-            self.status.valid_host = False
-            self.status.valid_credentials = False
-            return
-        try:
-            if request.type not in ("http", "https"):
-                self.status.roms = []
-                self.status.valid_host = False
-                self.status.valid_credentials = False
-                return
-            response = urlopen(request, timeout=1800)  # trunk-ignore(bandit/B310)
-        except HTTPError as e:
-            if e.code == 403:
-                self.status.roms = []
-                self.status.valid_host = True
-                self.status.valid_credentials = False
-                return
-            else:
-                raise
-        except URLError:
+        query = urlencode(
+            {f"{view}_id": id, "order_by": "name", "order_dir": "asc", "limit": 10000}
+        )
+        # { 'items': list[dict], 'total': number, 'limit': number, 'offset': number }
+        roms = self._http_get_json(
+            f"{self._roms_url}?{query}",
+            timeout=1800,
+        )
+        if roms is None:
             self.status.roms = []
-            self.status.valid_host = False
-            self.status.valid_credentials = False
             return
-
-        # { 'items': list[dict], 'total': number, 'limit': number, 'offset': number }
-        roms = json.loads(response.read().decode("utf-8"))
         if isinstance(roms, dict):
             roms = roms["items"]
 
         # Get the list of subfolders in the ROMs directory for non-muOS filtering
-        roms_subfolders = set()
+        roms_subfolders: frozenset[str] = frozenset()
         if not self.file_system.is_muos and not self.file_system.is_spruceos:
-            roms_path = self.file_system.get_roms_storage_path()
-            if os.path.exists(roms_path):
-                roms_subfolders = {
-                    d.lower()
-                    for d in os.listdir(roms_path)
-                    if os.path.isdir(os.path.join(roms_path, d))
-                }
-
-        _roms = []
-        for rom in roms:
-            platform_slug = rom["platform_slug"].lower()
-            if (
-                platform_maps._env_maps
-                and platform_slug in platform_maps._env_platforms
-            ):
-                pass
-            elif self.file_system.is_muos:
-                if platform_slug not in platform_maps.MUOS_SUPPORTED_PLATFORMS:
-                    continue
-            elif self.file_system.is_spruceos:
-                if platform_slug not in platform_maps.SPRUCEOS_SUPPORTED_PLATFORMS:
-                    continue
-            else:
-                mapped_folder, icon_file = platform_maps.ES_FOLDER_MAP.get(
-                    platform_slug.lower(), (platform_slug, platform_slug)
-                )
-                if mapped_folder.lower() not in roms_subfolders:
-                    continue
+            roms_subfolders = self.file_system.get_roms_subfolders()
+
+        # A library only spans a few platforms, decide once per slug
+        allowed_slugs: set[str] = set()
+        for slug in {rom["platform_slug"] for rom in roms}:
+            # Lowered once, the supported platform sets use lowercase slugs
+            platform_slug = slug.lower()
+            if not self._is_platform_supported(platform_slug, roms_subfolders):
+                continue
             if view == View.PLATFORMS and platform_slug != selected_platform_slug:
                 continue
-            _roms.append(
-                Rom(
-                    id=rom["id"],
-                    name=rom["name"],
-                    fs_name=rom["fs_name"],
-                    platform_slug=rom["platform_slug"],
-                    fs_extension=rom["fs_extension"],
-                    fs_size=self._human_readable_size(rom["fs_size_bytes"]),
-                    fs_size_bytes=rom["fs_size_bytes"],
-                    multi=rom["multi"],
-                    languages=rom["languages"],
-                    regions=rom["regions"],
-                    revision=rom["revision"],
-                    tags=rom["tags"],
-                )
+            allowed_slugs.add(slug)
+
+        # Bound once, the list is built for every ROM of the library
+        human_readable_size = self._human_readable_size
+        _roms = [
+            Rom(
+                id=rom["id"],
+                name=rom["name"],
+                fs_name=rom["fs_name"],
+                platform_slug=rom["platform_slug"],
+                fs_extension=rom["fs_extension"],
+                fs_size=human_readable_size(rom["fs_size_bytes"]),
+                fs_size_bytes=rom["fs_size_bytes"],
+                multi=rom["multi"],
+                languages=rom["languages"],
+                regions=rom["regions"],
+                revision=rom["revision"],
+                tags=rom["tags"],
             )
+            for rom in roms
+            if rom["platform_slug"] in allowed_slugs
+        ]
 
         self.status.roms = _roms
         self.status.valid_host = True
@@ -525,100 +672,251 @@ class API:
         self.status.download_rom_ready.set()
         self.status.abort_download.set()
 
-    def download_rom(self) -> None:
-        self.status.download_queue.sort(key=lambda rom: rom.name)
-        for i, rom in enumerate(self.status.download_queue):
+    def _start_extraction(self, rom: Rom) -> None:
+        with self._download_lock:
+            self._extracting_roms.append(rom)
             self.status.downloading_rom = rom
-            self.status.downloading_rom_position = i + 1
-            dest_path = os.path.join(
-                self.file_system.get_platforms_storage_path(rom.platform_slug),
-                self._sanitize_filename(rom.fs_name),
-            )
-            url = f"{self.host}/{self._roms_endpoint}/{rom.id}/content/{quote(rom.fs_name)}?hidden_folder=true"
-            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            self.status.extracted_percent = 0.0
+            self.status.extracting_rom = True
 
+    def _finish_extraction(self, rom: Rom) -> None:
+        """Show the extraction still running, if any, once this one is over."""
+        with self._download_lock:
+            self._extracting_roms.remove(rom)
+            if self._extracting_roms:
+                self.status.downloading_rom = self._extracting_roms[0]
+            else:
+                self.status.extracting_rom = False
+
+    def _extract_zip_file(self, zip_path: str, rom: Rom) -> bool:
+        """Extract a multi-file ROM archive next to it, False if aborted."""
+        # Progress is measured on compressed bytes, no need to sum the members first
+        total_size = os.path.getsize(zip_path) or 1
+        with zipfile.ZipFile(zip_path, "r") as zip_ref:
+            extracted_size = 0
+            for file in zip_ref.infolist():
+                if self.status.abort_download.is_set():
+                    return False
+                file_path = os.path.join(
+                    os.path.dirname(zip_path),
+                    self._sanitize_filename(file.filename),
+                )
+                # Directory entries only need the folder itself
+                if file.is_dir():
+                    self._ensure_dir(file_path)
+                    continue
+                self._ensure_dir(os.path.dirname(file_path))
+                with open(file_path, "wb") as target:
+                    # Small members are cheaper to read in one go
+                    if file.file_size < 64 * 1024:
+                        target.write(zip_ref.read(file))
+                    else:
+                        with zip_ref.open(file) as source:
+                            shutil.copyfileobj(source, target, length=1024 * 1024)
+                extracted_size += file.compress_size
+                # Only the extraction shown in the header reports its progress
+                if self.status.downloading_rom is rom:
+                    self.status.extracted_percent = (extracted_size / total_size) * 100
+        return True
+
+    def _add_downloaded_bytes(self, size: int) -> None:
+        with self._download_lock:
+            self.status.total_downloaded_bytes += size
+            # The UI redraws at ~60 FPS, don't update it more than needed
+            now = time.monotonic()
+            if now - self._last_progress_report >= 0.1:
+                self._last_progress_report = now
+                self.status.downloaded_percent = (
+                    self.status.total_downloaded_bytes / self._download_total_bytes
+                ) * 100
+
+    def _request_rom(
+        self, url: str, resume_from: int, validator: str
+    ) -> Tuple[Optional[requests.Response], int]:
+        """
+        GET a ROM, resuming after resume_from bytes when the server copy still
+        matches validator. Returns the response to copy from (None when the
+        partial file is already complete) and the offset its body starts at.
+        """
+        if resume_from and validator:
+            headers = {"Range": f"bytes={resume_from}-", "If-Range": validator}
+            response = self._session.get(url, headers=headers, timeout=60, stream=True)
+            content_range = response.headers.get("Content-Range", "")
+            if response.status_code == 206 and content_range.startswith(
+                f"bytes {resume_from}-"
+            ):
+                return response, resume_from
+            # The server copy changed, If-Range already sent all of it
+            if response.status_code == 200:
+                return response, 0
+            response.close()
+            if (
+                response.status_code == 416
+                and content_range == f"bytes */{resume_from}"
+            ):
+                return None, resume_from
+            if response.status_code not in (206, 416):
+                response.raise_for_status()
+        # No usable partial file, start over
+        response = self._session.get(url, timeout=60, stream=True)
+        response.raise_for_status()
+        return response, 0
+
+    @staticmethod
+    def _write_resume_validator(path: str, response: requests.Response) -> None:
+        """Remember what identifies the server copy a partial download comes from."""
+        # If-Range only accepts strong ETags
+        etag = response.headers.get("ETag", "")
+        validator = (
+            etag
+            if etag and not etag.startswith("W/")
+            else response.headers.get("Last-Modified", "")
+        )
+        try:
+            if validator:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(validator)
+            else:
+                os.remove(path)
+        except OSError:
+            pass
+
+    def _rom_download_paths(self, rom: Rom) -> Tuple[str, str, str]:
+        """Destination of a ROM, its partial download and the validator of it."""
+        directory = self.file_system.get_platforms_storage_path(rom.platform_slug)
+        file_name = self._sanitize_filename(rom.fs_name)
+        # Interrupted downloads are kept aside and resumed on the next try,
+        # along with the ETag or Last-Modified of the server copy they came from.
+        # Hidden, they do not show up as games in the platform folder
+        part_path = os.path.join(directory, f".{file_name}.part")
+        return os.path.join(directory, file_name), part_path, f"{part_path}.validator"
+
+    @staticmethod
+    def _remove_partial_files(*paths: str) -> None:
+        for path in paths:
             try:
-                print(f"Fetching: {url}")
-                request = Request(url, headers=self.headers)
-            except ValueError:
-                self._reset_download_status()
-                return
-            try:
-                if request.type not in ("http", "https"):
-                    self._reset_download_status()
-                    return
-                print(f"Downloading {rom.name} to {dest_path}")
-                with (
-                    urlopen(request) as response,  # trunk-ignore(bandit/B310)
-                    open(dest_path, "wb") as out_file,
-                ):
-                    self.status.total_downloaded_bytes = 0
-                    chunk_size = 1024
-                    while True:
-                        if not self.status.abort_download.is_set():
-                            chunk = response.read(chunk_size)
-                            if not chunk:
-                                print("Finalized download")
-                                break
-                            out_file.write(chunk)
-                            self.status.valid_host = True
-                            self.status.valid_credentials = True
-                            self.status.total_downloaded_bytes += len(chunk)
-                            self.status.downloaded_percent = (
-                                self.status.total_downloaded_bytes
-                                / (
-                                    self.status.downloading_rom.fs_size_bytes + 1
-                                )  # Add 1 virtual byte to avoid division by zero
-                            ) * 100
-                        else:
-                            self._reset_download_status(True, True)
-                            os.remove(dest_path)
-                            return
-                # Handle multi-file (ZIP) ROMs
-                if rom.multi:
-                    self.status.extracting_rom = True
-                    print("Multi file rom detected. Extracting...")
-                    with zipfile.ZipFile(dest_path, "r") as zip_ref:
-                        total_size = sum(file.file_size for file in zip_ref.infolist())
-                        extracted_size = 0
-                        chunk_size = 1024
-                        for file in zip_ref.infolist():
-                            if not self.status.abort_download.is_set():
-                                file_path = os.path.join(
-                                    os.path.dirname(dest_path),
-                                    self._sanitize_filename(file.filename),
-                                )
-                                os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                                with (
-                                    zip_ref.open(file) as source,
-                                    open(file_path, "wb") as target,
-                                ):
-                                    while True:
-                                        chunk = source.read(chunk_size)
-                                        if not chunk:
-                                            break
-                                        target.write(chunk)
-                                        extracted_size += len(chunk)
-                                        self.status.extracted_percent = (
-                                            extracted_size / total_size
-                                        ) * 100
-                            else:
-                                self._reset_download_status(True, True)
-                                os.remove(dest_path)
-                                return
-                    self.status.extracting_rom = False
-                    self.status.downloading_rom = None
-                    os.remove(dest_path)
-                    print(f"Extracted {rom.name} at {os.path.dirname(dest_path)}")
-            except HTTPError as e:
-                if e.code == 403:
-                    self._reset_download_status(valid_host=True)
-                    return
-                else:
-                    raise
-            except URLError:
-                self._reset_download_status(valid_host=True)
-                return
+                os.remove(path)
+            except OSError:
+                pass
+
+    def remove_partial_download(self, rom: Rom) -> None:
+        """Delete what an interrupted download left of a ROM, if anything."""
+        _dest_path, part_path, validator_path = self._rom_download_paths(rom)
+        self._remove_partial_files(part_path, validator_path)
+
+    def _download_queued_rom(self, rom: Rom) -> Optional[Tuple[bool, bool]]:
+        """Download (and extract if needed) a single ROM of the queue.
+
+        Returns the (valid_host, valid_credentials) pair to report if the
+        download failed, None if it finished or was aborted.
+        """
+        if self.status.abort_download.is_set():
+            return None
+
+        with self._download_lock:
+            # An extraction in progress keeps the header until it is done
+            if not self._extracting_roms:
+                self.status.downloading_rom = rom
+            self.status.downloading_rom_position += 1
+        dest_path, part_path, validator_path = self._rom_download_paths(rom)
+        url = (
+            f"{self._roms_url}/{rom.id}/content/{quote(rom.fs_name)}?hidden_folder=true"
+        )
+        self._ensure_dir(os.path.dirname(dest_path))
+        try:
+            with open(validator_path, encoding="utf-8") as f:
+                validator = f.read()
+            resume_from = os.path.getsize(part_path)
+        except OSError:
+            validator = ""
+            resume_from = 0
+
+        try:
+            logger.debug("Fetching: %s", url)
+            response, resume_from = self._request_rom(url, resume_from, validator)
+            logger.debug("Downloading %s to %s", rom.name, dest_path)
+            self.status.valid_host = True
+            self.status.valid_credentials = True
+            with self._download_lock:
+                self.status.total_downloaded_bytes += resume_from
+            # None when the partial file already holds the whole ROM
+            if response is not None:
+                if not resume_from:
+                    # Starting over, drop what is left of an older download
+                    self._remove_partial_files(part_path, validator_path)
+                    self._write_resume_validator(validator_path, response)
+                mode = "ab" if resume_from else "wb"
+                # Buffer a few chunks so the SD card gets fewer, larger writes
+                with response, open(part_path, mode, buffering=1 << 20) as out_file:
+                    # Copy in C from the socket, urllib3 undoes any Content-Encoding
+                    response.raw.decode_content = True
+                    writer = _ProgressWriter(
+                        out_file,
+                        self.status.abort_download,
+                        self._add_downloaded_bytes,
+                    )
+                    try:
+                        shutil.copyfileobj(response.raw, writer, length=1 << 20)
+                    except _DownloadAborted:
+                        return None
+            with self._download_lock:
+                self.status.downloaded_percent = (
+                    self.status.total_downloaded_bytes / self._download_total_bytes
+                ) * 100
+            os.replace(part_path, dest_path)
+            self._remove_partial_files(validator_path)
+            logger.debug("Finalized download")
+            # Handle multi-file (ZIP) ROMs
+            if rom.multi:
+                logger.debug("Multi file rom detected. Extracting...")
+                self._start_extraction(rom)
+                try:
+                    extracted = self._extract_zip_file(dest_path, rom)
+                finally:
+                    self._finish_extraction(rom)
+                os.remove(dest_path)
+                if not extracted:
+                    return None
+                logger.info("Extracted %s at %s", rom.name, os.path.dirname(dest_path))
+        except ValueError:
+            self.status.abort_download.set()
+            return (False, False)
+        except HTTPError as e:
+            if e.response.status_code == 403:
+                self.status.abort_download.set()
+                return (True, False)
+            else:
+                raise
+        # Reading the raw stream raises urllib3 errors, not the requests ones
+        except (RequestException, urllib3.exceptions.HTTPError):
+            self.status.abort_download.set()
+            return (True, False)
+        return None
+
+    def download_rom(self) -> None:
+        self.status.download_queue.sort(key=attrgetter("name"))
+        self.status.downloading_rom_position = 0
+        self.status.total_downloaded_bytes = 0
+        # Add 1 virtual byte to avoid division by zero
+        self._download_total_bytes = (
+            sum(rom.fs_size_bytes for rom in self.status.download_queue) + 1
+        )
+
+        # Download several ROMs at once, a failing download aborts the others
+        with ThreadPoolExecutor(max_workers=self._download_workers) as executor:
+            failures = [
+                failure
+                for failure in executor.map(
+                    self._download_queued_rom, self.status.download_queue
+                )
+                if failure
+            ]
+        # New (or partially removed) files must show up in the ROM list
+        self.file_system.invalidate_roms_cache()
+
+        if failures:
+            self._reset_download_status(*failures[0])
+            return
         # End of download
         self._reset_download_status(valid_host=True, valid_credentials=True)
 
@@ -631,16 +929,16 @@ class API:
                 "password": self.password,
                 "scope": "assets:read"
             }
-            data_str = "&".join([f"{k}={quote(str(v))}" for k, v in data.items()])
-            
-            request = Request(
-                f"{self.host}/{self._auth_token_endpoint}",
-                data=data_str.encode("utf-8"),
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
+            response = self._session.post(
+                self._auth_token_url,
+                # requestsがフォーム形式にエンコードする
+                data=data,
+                # トークン取得時はセッションのBasic認証ヘッダーを送らない
+                headers={"Authorization": None},
+                timeout=60,
             )
-            
-            response = urlopen(request, timeout=60)
-            token_data = json.loads(response.read().decode("utf-8"))
+            response.raise_for_status()
+            token_data = response.json()
             
             self.access_token = token_data.get("access_token")
             self.refresh_token = token_data.get("refresh_token")
@@ -648,18 +946,23 @@ class API:
             
             if self.access_token:
                 self.token_expires_at = time.time() + expires_in
+                self._save_token()
                 return True
             return False
         except HTTPError as e:
-            print(f"Failed to get access token: HTTP Error {e.code}: {e.reason}")
-            if e.code == 403:
-                print("Authentication failed - check username and password")
+            logger.error(
+                "Failed to get access token: HTTP Error %s: %s",
+                e.response.status_code,
+                e.response.reason,
+            )
+            if e.response.status_code == 403:
+                logger.error("Authentication failed - check username and password")
             return False
-        except URLError as e:
-            print(f"Failed to get access token: URL Error {e}")
+        except RequestException as e:
+            logger.error("Failed to get access token: URL Error %s", e)
             return False
         except Exception as e:
-            print(f"Failed to get access token: {e}")
+            logger.error("Failed to get access token: %s", e)
             return False
 
     def _refresh_access_token(self) -> bool:
@@ -672,16 +975,16 @@ class API:
                 "grant_type": "refresh_token",
                 "refresh_token": self.refresh_token
             }
-            data_str = "&".join([f"{k}={quote(str(v))}" for k, v in data.items()])
-            
-            request = Request(
-                f"{self.host}/{self._auth_token_endpoint}",
-                data=data_str.encode("utf-8"),
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
+            response = self._session.post(
+                self._auth_token_url,
+                # requestsがフォーム形式にエンコードする
+                data=data,
+                # トークン取得時はセッションのBasic認証ヘッダーを送らない
+                headers={"Authorization": None},
+                timeout=60,
             )
-            
-            response = urlopen(request, timeout=60)
-            token_data = json.loads(response.read().decode("utf-8"))
+            response.raise_for_status()
+            token_data = response.json()
             
             self.access_token = token_data.get("access_token")
             self.refresh_token = token_data.get("refresh_token")
@@ -689,437 +992,276 @@ class API:
             
             if self.access_token:
                 self.token_expires_at = time.time() + expires_in
+                self._save_token()
                 return True
             return False
         except HTTPError as e:
-            print(f"Failed to refresh access token: HTTP Error {e.code}: {e.reason}")
+            logger.error(
+                "Failed to refresh access token: HTTP Error %s: %s",
+                e.response.status_code,
+                e.response.reason,
+            )
             return self._get_access_token()
-        except URLError as e:
-            print(f"Failed to refresh access token: URL Error {e}")
+        except RequestException as e:
+            logger.error("Failed to refresh access token: URL Error %s", e)
             return self._get_access_token()
         except Exception as e:
-            print(f"Failed to refresh access token: {e}")
+            logger.error("Failed to refresh access token: %s", e)
             return self._get_access_token()
 
+    def _load_token(self) -> None:
+        """前回のトークンを読み込む (同じホストとユーザーの場合のみ)"""
+        token = self._read_cache_file("token")
+        if (
+            isinstance(token, dict)
+            and token.get("host") == self.host
+            and token.get("username") == self.username
+        ):
+            self.access_token = token.get("access_token")
+            self.refresh_token = token.get("refresh_token")
+            self.token_expires_at = token.get("token_expires_at")
+
+    def _save_token(self) -> None:
+        """トークンを次回の起動のために保存する"""
+        self._write_cache_file(
+            "token",
+            {
+                "host": self.host,
+                "username": self.username,
+                "access_token": self.access_token,
+                "refresh_token": self.refresh_token,
+                "token_expires_at": self.token_expires_at,
+            },
+        )
+
+    def _discard_token(self, rejected_token: str) -> None:
+        """サーバーに拒否されたトークンを破棄する (保存済みのファイルも含む)"""
+        with self._token_lock:
+            # 他のスレッドが既に新しいトークンを取得していれば何もしない
+            if self.access_token != rejected_token:
+                return
+            self.access_token = None
+            self.token_expires_at = None
+            self._save_token()
+
     def _ensure_valid_token(self) -> bool:
         """有効なアクセストークンを確保する"""
-        if not self.access_token:
-            return self._get_access_token()
-        
-        if self.token_expires_at and time.time() >= self.token_expires_at:
-            return self._refresh_access_token()
-        
-        return True
+        # 並行したリクエストが同時にトークンを取得しないようにする
+        with self._token_lock:
+            if not self.access_token:
+                return self._get_access_token()
 
-    def fetch_saves(self, rom_id: str = None, platform_id: str = None) -> None:
-        """セーブデータ一覧を取得する"""
-        print("Fetching saves...")
+            if (
+                self.token_expires_at
+                and time.time() >= self.token_expires_at - self._token_expiry_margin
+            ):
+                return self._refresh_access_token()
+
+            return True
+
+    @staticmethod
+    def _list_url(
+        base_url: str, rom_id: Optional[str], platform_id: Optional[str]
+    ) -> str:
+        """URL of a saves/states list, filtered by the given ROM and platform."""
+        query = urlencode(
+            {
+                key: value
+                for key, value in (("rom_id", rom_id), ("platform_id", platform_id))
+                if value
+            }
+        )
+        return f"{base_url}?{query}" if query else base_url
+
+    def _authed_get(
+        self, url: str, headers: Optional[dict] = None, stream: bool = False
+    ) -> requests.Response:
+        """
+        GET a saves/states resource, with Basic auth first and the access token
+        once the server refuses it. HTTP errors are raised like raise_for_status.
+        """
+        headers = headers or {}
         # まず既存のBasic認証を試す
-        try:
-            url = f"{self.host}/{self._saves_endpoint}"
-            params = []
-            if rom_id:
-                params.append(f"rom_id={rom_id}")
-            if platform_id:
-                params.append(f"platform_id={platform_id}")
-            
-            if params:
-                url += "?" + "&".join(params)
-            
-            print(f"Trying Basic auth with URL: {url}")
-            # 既存のBasic認証ヘッダーを使用
-            request = Request(url, headers=self.headers)
-            
-            response = urlopen(request, timeout=60)
-            saves_data = json.loads(response.read().decode("utf-8"))
-            
-            print(f"Basic auth successful, got {len(saves_data)} saves")
-            from models import SaveData
-            self.status.saves = []
-            for save_data in saves_data:
-                save = SaveData(
-                    id=save_data.get("id"),
-                    rom_id=save_data.get("rom_id"),
-                    user_id=save_data.get("user_id"),
-                    file_name=save_data.get("file_name", ""),
-                    file_name_no_tags=save_data.get("file_name_no_tags", ""),
-                    file_name_no_ext=save_data.get("file_name_no_ext", ""),
-                    file_extension=save_data.get("file_extension", ""),
-                    file_path=save_data.get("file_path", ""),
-                    file_size_bytes=save_data.get("file_size_bytes", 0),
-                    full_path=save_data.get("full_path", ""),
-                    download_path=save_data.get("download_path", ""),
-                    missing_from_fs=save_data.get("missing_from_fs", False),
-                    created_at=save_data.get("created_at", ""),
-                    updated_at=save_data.get("updated_at", ""),
-                    emulator=save_data.get("emulator"),
-                    screenshot=save_data.get("screenshot")
-                )
-                self.status.saves.append(save)
-            
-            self.status.saves_ready.set()
-            return
-        except HTTPError as e:
-            print(f"Basic auth failed for saves API: {e.code}")
-            # Basic認証が失敗した場合、Bearer token認証を試す
-            pass
-        except Exception as e:
-            print(f"Basic auth failed for saves API: {e}")
-            pass
-        
-        print("Trying Bearer token auth...")
+        if self._preferred_auth != "bearer":
+            logger.debug("Trying Basic auth with URL: %s", url)
+            response = self._session.get(
+                url, headers=headers, timeout=60, stream=stream
+            )
+            if response.status_code not in (401, 403):
+                response.raise_for_status()
+                self._preferred_auth = "basic"
+                return response
+            logger.warning(
+                "Basic auth failed with URL %s: %s", url, response.status_code
+            )
+            response.close()
+            self._preferred_auth = "bearer"
+
         # Bearer token認証を試す
-        if not self._ensure_valid_token():
-            print("Failed to get valid token for saves API")
-            self.status.saves_ready.set()
-            return
-        
+        # 拒否されたトークンは破棄し、新しいトークンで一度だけ再試行する
+        for attempt in range(2):
+            if not self._ensure_valid_token():
+                raise RequestException("Failed to get valid token")
+            token = self.access_token
+            logger.debug("Trying Bearer auth with URL: %s", url)
+            response = self._session.get(
+                url,
+                headers={**headers, "Authorization": f"Bearer {token}"},
+                timeout=60,
+                stream=stream,
+            )
+            if attempt or response.status_code not in (401, 403):
+                break
+            logger.warning(
+                "Access token rejected with URL %s: %s", url, response.status_code
+            )
+            response.close()
+            self._discard_token(token)
+        response.raise_for_status()
+        return response
+
+    def _fetch_asset_list(self, url: str, asset_cls: Any) -> list:
+        assets = self._get_json(
+            url, lambda headers: self._authed_get(url, headers=headers)
+        )
+        return [_build_asset(asset_cls, d) for d in assets]
+
+    def _download_user_asset(
+        self, kind: str, asset_id: str, file_name: str
+    ) -> Optional[str]:
+        """Download a save or state of the user into the matching ROMs subfolder."""
+        response = self._authed_get(
+            f"{self._user_assets_url}/{kind}/{asset_id}", stream=True
+        )
+        directory = os.path.join(self.file_system.get_roms_storage_path(), kind)
+        file_path = os.path.join(directory, self._sanitize_filename(file_name))
+        # Write aside and swap, a dropped connection never truncates a local save
+        tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+        with response:
+            self._ensure_dir(directory)
+            response.raw.decode_content = True
+            try:
+                with open(tmp_path, "wb") as f:
+                    shutil.copyfileobj(response.raw, f, length=1 << 16)
+                os.replace(tmp_path, file_path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+        return file_path
+
+    def fetch_saves(self, rom_id: str = None, platform_id: str = None) -> None:
+        """セーブデータ一覧を取得する"""
+        logger.debug("Fetching saves...")
         try:
-            url = f"{self.host}/{self._saves_endpoint}"
-            params = []
-            if rom_id:
-                params.append(f"rom_id={rom_id}")
-            if platform_id:
-                params.append(f"platform_id={platform_id}")
-            
-            if params:
-                url += "?" + "&".join(params)
-            
-            print(f"Trying Bearer auth with URL: {url}")
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            request = Request(url, headers=headers)
-            
-            response = urlopen(request, timeout=60)
-            saves_data = json.loads(response.read().decode("utf-8"))
-            
-            print(f"Bearer auth successful, got {len(saves_data)} saves")
-            from models import SaveData
-            self.status.saves = []
-            for save_data in saves_data:
-                save = SaveData(
-                    id=save_data.get("id"),
-                    rom_id=save_data.get("rom_id"),
-                    user_id=save_data.get("user_id"),
-                    file_name=save_data.get("file_name", ""),
-                    file_name_no_tags=save_data.get("file_name_no_tags", ""),
-                    file_name_no_ext=save_data.get("file_name_no_ext", ""),
-                    file_extension=save_data.get("file_extension", ""),
-                    file_path=save_data.get("file_path", ""),
-                    file_size_bytes=save_data.get("file_size_bytes", 0),
-                    full_path=save_data.get("full_path", ""),
-                    download_path=save_data.get("download_path", ""),
-                    missing_from_fs=save_data.get("missing_from_fs", False),
-                    created_at=save_data.get("created_at", ""),
-                    updated_at=save_data.get("updated_at", ""),
-                    emulator=save_data.get("emulator"),
-                    screenshot=save_data.get("screenshot")
-                )
-                self.status.saves.append(save)
-            
-            self.status.saves_ready.set()
+            self.status.saves = self._fetch_asset_list(
+                self._list_url(self._saves_url, rom_id, platform_id), SaveData
+            )
+            logger.debug("Got %s saves", len(self.status.saves))
         except HTTPError as e:
-            print(f"Failed to fetch saves: HTTP Error {e.code}: {e.reason}")
-            self.status.saves_ready.set()
-        except URLError as e:
-            print(f"Failed to fetch saves: URL Error {e}")
-            self.status.saves_ready.set()
+            logger.error(
+                "Failed to fetch saves: HTTP Error %s: %s",
+                e.response.status_code,
+                e.response.reason,
+            )
+        except RequestException as e:
+            logger.error("Failed to fetch saves: URL Error %s", e)
         except Exception as e:
-            print(f"Failed to fetch saves: {e}")
+            logger.error("Failed to fetch saves: %s", e)
+        finally:
             self.status.saves_ready.set()
 
-    def fetch_save_detail(self, save_id: str) -> dict:
+    def fetch_save_detail(self, save_id: str) -> Optional[dict]:
         """特定のセーブデータの詳細を取得する"""
-        # まず既存のBasic認証を試す
-        try:
-            url = f"{self.host}/{self._saves_endpoint}/{save_id}"
-            request = Request(url, headers=self.headers)
-            
-            response = urlopen(request, timeout=60)
-            return json.loads(response.read().decode("utf-8"))
-        except HTTPError as e:
-            print(f"Basic auth failed for save detail API: {e.code}")
-            # Basic認証が失敗した場合、Bearer token認証を試す
-            pass
-        except Exception as e:
-            print(f"Basic auth failed for save detail API: {e}")
-            pass
-        
-        # Bearer token認証を試す
-        if not self._ensure_valid_token():
-            print("Failed to get valid token for save detail API")
-            return None
-        
+        detail = self.status.save_details.get(save_id)
+        if detail is not None:
+            return detail
+
         try:
-            url = f"{self.host}/{self._saves_endpoint}/{save_id}"
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            request = Request(url, headers=headers)
-            
-            response = urlopen(request, timeout=60)
-            return json.loads(response.read().decode("utf-8"))
+            response = self._authed_get(f"{self._saves_url}/{save_id}")
+            detail = self.status.save_details[save_id] = _json_loads(response.content)
+            return detail
         except HTTPError as e:
-            print(f"Failed to fetch save detail: HTTP Error {e.code}: {e.reason}")
-            return None
-        except URLError as e:
-            print(f"Failed to fetch save detail: URL Error {e}")
-            return None
+            logger.error(
+                "Failed to fetch save detail: HTTP Error %s: %s",
+                e.response.status_code,
+                e.response.reason,
+            )
+        except RequestException as e:
+            logger.error("Failed to fetch save detail: URL Error %s", e)
         except Exception as e:
-            print(f"Failed to fetch save detail: {e}")
-            return None
+            logger.error("Failed to fetch save detail: %s", e)
+        return None
 
-    def download_save(self, save_id: str, save_name: str) -> None:
+    def download_save(self, save_id: str, save_name: str) -> Optional[str]:
         """セーブデータをダウンロードする"""
-        print(f"Downloading save: {save_name}")
-        
-        # まず既存のBasic認証を試す
-        try:
-            url = f"{self.host}/api/raw/assets/users/{self.username}/saves/{save_id}"
-            print(f"Trying Basic auth with URL: {url}")
-            
-            request = Request(url, headers=self.headers)
-            response = urlopen(request, timeout=60)
-            
-            # セーブデータ用のディレクトリを作成
-            saves_dir = os.path.join(self.file_system.get_roms_storage_path(), "saves")
-            os.makedirs(saves_dir, exist_ok=True)
-            
-            # ファイル名を安全にする
-            safe_filename = self._sanitize_filename(save_name)
-            file_path = os.path.join(saves_dir, safe_filename)
-            
-            with open(file_path, "wb") as f:
-                f.write(response.read())
-            
-            print(f"Save downloaded to: {file_path}")
-            return file_path
-            
-        except HTTPError as e:
-            print(f"Basic auth failed for save download: {e.code}")
-            pass
-        except Exception as e:
-            print(f"Basic auth failed for save download: {e}")
-            pass
-        
-        print("Trying Bearer token auth...")
-        # Bearer token認証を試す
-        if not self._ensure_valid_token():
-            print("Failed to get valid token for save download")
-            return None
-        
+        logger.debug("Downloading save: %s", save_name)
         try:
-            url = f"{self.host}/api/raw/assets/users/{self.username}/saves/{save_id}"
-            print(f"Trying Bearer auth with URL: {url}")
-            
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            request = Request(url, headers=headers)
-            response = urlopen(request, timeout=60)
-            
-            # セーブデータ用のディレクトリを作成
-            saves_dir = os.path.join(self.file_system.get_roms_storage_path(), "saves")
-            os.makedirs(saves_dir, exist_ok=True)
-            
-            # ファイル名を安全にする
-            safe_filename = self._sanitize_filename(save_name)
-            file_path = os.path.join(saves_dir, safe_filename)
-            
-            with open(file_path, "wb") as f:
-                f.write(response.read())
-            
-            print(f"Save downloaded to: {file_path}")
-            return file_path
-            
+            file_path = self._download_user_asset("saves", save_id, save_name)
         except HTTPError as e:
-            print(f"Failed to download save: HTTP Error {e.code}: {e.reason}")
+            logger.error(
+                "Failed to download save: HTTP Error %s: %s",
+                e.response.status_code,
+                e.response.reason,
+            )
             return None
-        except URLError as e:
-            print(f"Failed to download save: URL Error {e}")
+        except RequestException as e:
+            logger.error("Failed to download save: URL Error %s", e)
             return None
         except Exception as e:
-            print(f"Failed to download save: {e}")
+            logger.error("Failed to download save: %s", e)
             return None
+        logger.info("Save downloaded to: %s", file_path)
+        return file_path
+
+    def download_saves_bulk(self, items: list[Tuple[str, str]]) -> list[Optional[str]]:
+        """Download several (save_id, save_name) saves at once.
+
+        Returns the downloaded paths in the order of items, None for failures.
+        """
+        with ThreadPoolExecutor(max_workers=self._download_workers) as executor:
+            return list(executor.map(lambda item: self.download_save(*item), items))
 
     def fetch_states(self, rom_id: str = None, platform_id: str = None) -> None:
         """Statesave一覧を取得する"""
-        print("Fetching states...")
-        # まず既存のBasic認証を試す
-        try:
-            url = f"{self.host}/{self._states_endpoint}"
-            params = []
-            if rom_id:
-                params.append(f"rom_id={rom_id}")
-            if platform_id:
-                params.append(f"platform_id={platform_id}")
-            
-            if params:
-                url += "?" + "&".join(params)
-            
-            print(f"Trying Basic auth with URL: {url}")
-            # 既存のBasic認証ヘッダーを使用
-            request = Request(url, headers=self.headers)
-            
-            response = urlopen(request, timeout=60)
-            states_data = json.loads(response.read().decode("utf-8"))
-            
-            print(f"Basic auth successful, got {len(states_data)} states")
-            from models import StateSave
-            self.status.states = []
-            for state_data in states_data:
-                state = StateSave(
-                    id=state_data.get("id"),
-                    rom_id=state_data.get("rom_id"),
-                    user_id=state_data.get("user_id"),
-                    file_name=state_data.get("file_name", ""),
-                    file_name_no_tags=state_data.get("file_name_no_tags", ""),
-                    file_name_no_ext=state_data.get("file_name_no_ext", ""),
-                    file_extension=state_data.get("file_extension", ""),
-                    file_path=state_data.get("file_path", ""),
-                    file_size_bytes=state_data.get("file_size_bytes", 0),
-                    full_path=state_data.get("full_path", ""),
-                    download_path=state_data.get("download_path", ""),
-                    missing_from_fs=state_data.get("missing_from_fs", False),
-                    created_at=state_data.get("created_at", ""),
-                    updated_at=state_data.get("updated_at", ""),
-                    emulator=state_data.get("emulator"),
-                    screenshot=state_data.get("screenshot")
-                )
-                self.status.states.append(state)
-            
-            self.status.states_ready.set()
-            return
-        except HTTPError as e:
-            print(f"Basic auth failed for states API: {e.code}")
-            # Basic認証が失敗した場合、Bearer token認証を試す
-            pass
-        except Exception as e:
-            print(f"Basic auth failed for states API: {e}")
-            pass
-        
-        print("Trying Bearer token auth...")
-        # Bearer token認証を試す
-        if not self._ensure_valid_token():
-            print("Failed to get valid token for states API")
-            self.status.states_ready.set()
-            return
-        
+        logger.debug("Fetching states...")
         try:
-            url = f"{self.host}/{self._states_endpoint}"
-            params = []
-            if rom_id:
-                params.append(f"rom_id={rom_id}")
-            if platform_id:
-                params.append(f"platform_id={platform_id}")
-            
-            if params:
-                url += "?" + "&".join(params)
-            
-            print(f"Trying Bearer auth with URL: {url}")
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            request = Request(url, headers=headers)
-            
-            response = urlopen(request, timeout=60)
-            states_data = json.loads(response.read().decode("utf-8"))
-            
-            print(f"Bearer auth successful, got {len(states_data)} states")
-            from models import StateSave
-            self.status.states = []
-            for state_data in states_data:
-                state = StateSave(
-                    id=state_data.get("id"),
-                    rom_id=state_data.get("rom_id"),
-                    user_id=state_data.get("user_id"),
-                    file_name=state_data.get("file_name", ""),
-                    file_name_no_tags=state_data.get("file_name_no_tags", ""),
-                    file_name_no_ext=state_data.get("file_name_no_ext", ""),
-                    file_extension=state_data.get("file_extension", ""),
-                    file_path=state_data.get("file_path", ""),
-                    file_size_bytes=state_data.get("file_size_bytes", 0),
-                    full_path=state_data.get("full_path", ""),
-                    download_path=state_data.get("download_path", ""),
-                    missing_from_fs=state_data.get("missing_from_fs", False),
-                    created_at=state_data.get("created_at", ""),
-                    updated_at=state_data.get("updated_at", ""),
-                    emulator=state_data.get("emulator"),
-                    screenshot=state_data.get("screenshot")
-                )
-                self.status.states.append(state)
-            
-            self.status.states_ready.set()
+            self.status.states = self._fetch_asset_list(
+                self._list_url(self._states_url, rom_id, platform_id), StateSave
+            )
+            logger.debug("Got %s states", len(self.status.states))
         except HTTPError as e:
-            print(f"Failed to fetch states: HTTP Error {e.code}: {e.reason}")
-            self.status.states_ready.set()
-        except URLError as e:
-            print(f"Failed to fetch states: URL Error {e}")
-            self.status.states_ready.set()
+            logger.error(
+                "Failed to fetch states: HTTP Error %s: %s",
+                e.response.status_code,
+                e.response.reason,
+            )
+        except RequestException as e:
+            logger.error("Failed to fetch states: URL Error %s", e)
         except Exception as e:
-            print(f"Failed to fetch states: {e}")
+            logger.error("Failed to fetch states: %s", e)
+        finally:
             self.status.states_ready.set()
 
-    def download_state(self, state_id: str, state_name: str) -> None:
+    def download_state(self, state_id: str, state_name: str) -> Optional[str]:
         """Statesaveをダウンロードする"""
-        print(f"Downloading state: {state_name}")
-        
-        # まず既存のBasic認証を試す
+        logger.debug("Downloading state: %s", state_name)
         try:
-            url = f"{self.host}/api/raw/assets/users/{self.username}/states/{state_id}"
-            print(f"Trying Basic auth with URL: {url}")
-            
-            request = Request(url, headers=self.headers)
-            response = urlopen(request, timeout=60)
-            
-            # Statesave用のディレクトリを作成
-            states_dir = os.path.join(self.file_system.get_roms_storage_path(), "states")
-            os.makedirs(states_dir, exist_ok=True)
-            
-            # ファイル名を安全にする
-            safe_filename = self._sanitize_filename(state_name)
-            file_path = os.path.join(states_dir, safe_filename)
-            
-            with open(file_path, "wb") as f:
-                f.write(response.read())
-            
-            print(f"State downloaded to: {file_path}")
-            return file_path
-            
+            file_path = self._download_user_asset("states", state_id, state_name)
         except HTTPError as e:
-            print(f"Basic auth failed for state download: {e.code}")
-            pass
-        except Exception as e:
-            print(f"Basic auth failed for state download: {e}")
-            pass
-        
-        print("Trying Bearer token auth...")
-        # Bearer token認証を試す
-        if not self._ensure_valid_token():
-            print("Failed to get valid token for state download")
-            return None
-        
-        try:
-            url = f"{self.host}/api/raw/assets/users/{self.username}/states/{state_id}"
-            print(f"Trying Bearer auth with URL: {url}")
-            
-            headers = {"Authorization": f"Bearer {self.access_token}"}
-            request = Request(url, headers=headers)
-            response = urlopen(request, timeout=60)
-            
-            # Statesave用のディレクトリを作成
-            states_dir = os.path.join(self.file_system.get_roms_storage_path(), "states")
-            os.makedirs(states_dir, exist_ok=True)
-            
-            # ファイル名を安全にする
-            safe_filename = self._sanitize_filename(state_name)
-            file_path = os.path.join(states_dir, safe_filename)
-            
-            with open(file_path, "wb") as f:
-                f.write(response.read())
-            
-            print(f"State downloaded to: {file_path}")
-            return file_path
-            
-        except HTTPError as e:
-            print(f"Failed to download state: HTTP Error {e.code}: {e.reason}")
+            logger.error(
+                "Failed to download state: HTTP Error %s: %s",
+                e.response.status_code,
+                e.response.reason,
+            )
             return None
-        except URLError as e:
-            print(f"Failed to download state: URL Error {e}")
+        except RequestException as e:
+            logger.error("Failed to download state: URL Error %s", e)
             return None
         except Exception as e:
-            print(f"Failed to download state: {e}")
+            logger.error("Failed to download state: %s", e)
             return None
+        logger.info("State downloaded to: %s", file_path)
+        return file_path
@@ -8,6 +8,8 @@ color_btn_x = "#3b80aa"
 color_btn_y = "#41aa3b"
 color_btn_shoulder = "#383838"
 
+_CONTROLLER_LAYOUT_RE = re.compile(r"^\s*CONTROLLER_LAYOUT\s*=", re.IGNORECASE)
+
 
 class Button(TypedDict):
     key: str
@@ -75,7 +77,7 @@ def save_controller_layout(env_path=".env"):
         lines = []
 
     for i, line in enumerate(lines):
-        if re.match(r"^\s*CONTROLLER_LAYOUT\s*=", line, re.IGNORECASE):
+        if _CONTROLLER_LAYOUT_RE.match(line):
             lines[i] = layout
             break
     else:
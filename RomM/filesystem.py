@@ -27,6 +27,14 @@ class Filesystem:
         return cls._instance
 
     def __init__(self) -> None:
+        # Casefolded entry names of each platform folder,
+        # listed once instead of a stat per ROM
+        self._platform_entries: dict[str, frozenset[str]] = {}
+        # Lowercase platform folder names, per ROMs storage path
+        self._roms_subfolders: dict[str, frozenset[str]] = {}
+        # Bumped whenever the ROMs found on the device may have changed
+        self.roms_cache_version = 0
+
         # Optionally ensure resources directory exists (not required for roms dir)
         if not os.path.exists(self.resources_path):
             os.makedirs(self.resources_path, exist_ok=True)
@@ -121,6 +129,7 @@ class Filesystem:
             self._current_sd = 2
         else:
             self._current_sd = 1
+        self.roms_cache_version += 1
 
     def get_roms_storage_path(self) -> str:
         """Return the current SD storage path."""
@@ -129,6 +138,22 @@ class Filesystem:
 
         return self._sd1_roms_storage_path
 
+    def get_roms_subfolders(self) -> frozenset[str]:
+        """Return the lowercase names of the folders in the ROMs storage path."""
+        roms_path = self.get_roms_storage_path()
+        subfolders = self._roms_subfolders.get(roms_path)
+        if subfolders is None:
+            try:
+                # scandir knows the entry types, no stat per folder
+                with os.scandir(roms_path) as it:
+                    subfolders = frozenset(
+                        entry.name.lower() for entry in it if entry.is_dir()
+                    )
+            except FileNotFoundError:
+                subfolders = frozenset()
+            self._roms_subfolders[roms_path] = subfolders
+        return subfolders
+
     def get_platforms_storage_path(self, platform: str) -> str:
         """Return the storage path for a specific platform."""
         if self._current_sd == 2:
@@ -138,10 +163,27 @@ class Filesystem:
 
         return self._get_sd1_platforms_storage_path(platform)
 
+    def _get_platform_entries(self, platform_path: str) -> frozenset[str]:
+        entries = self._platform_entries.get(platform_path)
+        if entries is None:
+            try:
+                # SD cards are FAT32/exFAT, file names are case-insensitive
+                with os.scandir(platform_path) as it:
+                    entries = frozenset(entry.name.casefold() for entry in it)
+            except OSError:
+                entries = frozenset()
+            self._platform_entries[platform_path] = entries
+        return entries
+
+    def invalidate_roms_cache(self) -> None:
+        """Forget the cached platform folder listings after ROMs were added or removed."""
+        self._platform_entries.clear()
+        self._roms_subfolders.clear()
+        self.roms_cache_version += 1
+
     def is_rom_in_device(self, rom: Rom) -> bool:
         """Check if a ROM exists in the storage path."""
-        rom_path = os.path.join(
-            self.get_platforms_storage_path(rom.platform_slug),
-            rom.fs_name if not rom.multi else f"{rom.fs_name}.m3u",
+        rom_name = rom.fs_name if not rom.multi else f"{rom.fs_name}.m3u"
+        return rom_name.casefold() in self._get_platform_entries(
+            self.get_platforms_storage_path(rom.platform_slug)
         )
-        return os.path.exists(rom_path)
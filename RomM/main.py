@@ -1,5 +1,6 @@
 # trunk-ignore-all(ruff/E402)
 
+import logging
 import os
 import sys
 import zipfile
@@ -50,6 +51,15 @@ if not apply_pending_update():
     log_file = os.environ.get("LOG_FILE", "./logs/log.txt")
     os.makedirs(os.path.dirname(log_file), exist_ok=True)
     sys.stdout = open(log_file, "w", buffering=1)
+    log_level = os.getenv("LOG_LEVEL", "WARNING").upper()
+    if log_level not in logging.getLevelNamesMapping():
+        print(f"Unknown LOG_LEVEL {log_level}, using WARNING")
+        log_level = "WARNING"
+    logging.basicConfig(
+        stream=sys.stdout,
+        level=log_level,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
 
     # Read any custom maps
     init_env_maps()
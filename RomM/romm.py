@@ -1,6 +1,7 @@
 import os
 import threading
 import time
+from array import array
 from typing import Any, Dict, List, Tuple
 
 import sdl2
@@ -66,6 +67,10 @@ class RomM:
         self.max_n_platforms = 10
         self.max_n_collections = 10
         self.max_n_roms = 10
+        # One byte per ROM of status.roms telling whether it is on the device,
+        # reused until the ROM list or the device contents change
+        self._roms_in_device = array("b")
+        self._roms_in_device_key: Tuple[Any, int] = (None, -1)
         self.buttons_config: List[ButtonConfig] = []
         self.controller_layout = get_controller_layout()
 
@@ -270,6 +275,8 @@ class RomM:
                     self.platforms_selected_position
                 ]
                 self.status.current_view = View.ROMS
+                # Pick up ROMs added or removed outside the app
+                self.fs.invalidate_roms_cache()
                 threading.Thread(target=self.api.fetch_roms).start()
         elif self.input.key(self.controller_layout["y"]["key"]):
             if self.status.platforms_ready.is_set():
@@ -381,6 +388,8 @@ class RomM:
                 else:
                     self.status.selected_collection = selected_collection
                 self.status.current_view = View.ROMS
+                # Pick up ROMs added or removed outside the app
+                self.fs.invalidate_roms_cache()
                 threading.Thread(target=self.api.fetch_roms).start()
         elif self.input.key(self.controller_layout["y"]["key"]):
             if self.status.collections_ready.is_set():
@@ -409,6 +418,15 @@ class RomM:
                 len(self.status.collections),
             )
 
+    def _get_roms_in_device(self) -> array:
+        roms, version = self._roms_in_device_key
+        if roms is not self.status.roms or version != self.fs.roms_cache_version:
+            self._roms_in_device = array(
+                "b", map(self.fs.is_rom_in_device, self.status.roms)
+            )
+            self._roms_in_device_key = (self.status.roms, self.fs.roms_cache_version)
+        return self._roms_in_device
+
     def _render_roms_view(self):
         if len(self.status.roms) == 0 and self.status.roms_ready.is_set():
             header_text = "No ROMs available"
@@ -441,13 +459,12 @@ class RomM:
             header_text += f" ({len(self.status.multi_selected_roms)} selected)"
         if self.status.current_filter == Filter.ALL:
             self.status.roms_to_show = self.status.roms
-        elif self.status.current_filter == Filter.LOCAL:
-            self.status.roms_to_show = [
-                r for r in self.status.roms if self.fs.is_rom_in_device(r)
-            ]
-        elif self.status.current_filter == Filter.REMOTE:
+        else:
+            wanted = self.status.current_filter == Filter.LOCAL
             self.status.roms_to_show = [
-                r for r in self.status.roms if not self.fs.is_rom_in_device(r)
+                r
+                for r, in_device in zip(self.status.roms, self._get_roms_in_device())
+                if in_device == wanted
             ]
 
         self.ui.draw_roms_list(
@@ -577,6 +594,8 @@ class RomM:
         elif self.input.key(self.controller_layout["y"]["key"]):
             if self.status.roms_ready.is_set():
                 self.status.roms_ready.clear()
+                # Pick up ROMs added or removed outside the app
+                self.fs.invalidate_roms_cache()
                 threading.Thread(target=self.api.fetch_roms).start()
                 self.status.multi_selected_roms = []
         elif self.input.key(self.controller_layout["x"]["key"]):
@@ -1177,3 +1196,5 @@ class RomM:
                 [storage_path, full_path]
             ) == storage_path and os.path.isfile(full_path):
                 os.remove(full_path)
+        self.api.remove_partial_download(rom)
+        self.fs.invalidate_roms_cache()
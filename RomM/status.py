@@ -2,7 +2,7 @@ import itertools
 import threading
 from typing import Optional
 
-from models import Collection, Platform, Rom
+from models import Collection, Platform, Rom, SaveData, StateSave
 
 
 class View:
@@ -39,8 +39,8 @@ class Status:
         self.selected_platform: Optional[Platform] = None
         self.selected_collection: Optional[Collection] = None
         self.selected_virtual_collection: Optional[Collection] = None
-        self.selected_save: Optional["SaveData"] = None
-        self.selected_state: Optional["StateSave"] = None
+        self.selected_save: Optional[SaveData] = None
+        self.selected_state: Optional[StateSave] = None
 
         self.show_start_menu = False
         self.show_contextual_menu = False
@@ -49,10 +49,12 @@ class Status:
         self.collections: list[Collection] = []
         self.roms: list[Rom] = []
         self.roms_to_show: list[Rom] = []
-        self.saves: list["SaveData"] = []
-        self.saves_to_show: list["SaveData"] = []
-        self.states: list["StateSave"] = []
-        self.states_to_show: list["StateSave"] = []
+        self.saves: list[SaveData] = []
+        self.saves_to_show: list[SaveData] = []
+        # Save details already fetched, by save id
+        self.save_details: dict[str, dict] = {}
+        self.states: list[StateSave] = []
+        self.states_to_show: list[StateSave] = []
         self.filters = itertools.cycle([Filter.ALL, Filter.LOCAL, Filter.REMOTE])
         self.current_filter = next(self.filters)
 
@@ -87,6 +89,7 @@ class Status:
 
     def reset_saves_list(self) -> None:
         self.saves = []
+        self.save_details.clear()
 
     def reset_states_list(self) -> None:
         self.states = []
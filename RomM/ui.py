@@ -11,7 +11,7 @@ from config import (
 )
 from filesystem import Filesystem
 from glyps import glyphs
-from models import Collection, Platform, Rom
+from models import Collection, Platform, Rom, SaveData, StateSave
 from PIL import Image, ImageDraw, ImageFont
 from status import Status
 
@@ -49,6 +49,8 @@ class UserInterface:
         self.renderer = self._create_renderer()
         self.draw_start()
         self.opt_stretch = True
+        # Decoded icons, logo and profile picture, keyed by path
+        self._images: dict[str, Image.Image] = {}
         self._initialized = True
 
     def __new__(cls):
@@ -148,6 +150,15 @@ class UserInterface:
     # DRAWING FUNCTIONS
     ###
 
+    def _load_image(self, path: str) -> Image.Image:
+        """Decode an image file once and reuse it on the following frames."""
+        image = self._images.get(path)
+        if image is None:
+            image = Image.open(path)
+            image.load()
+            self._images[path] = image
+        return image
+
     def draw_clear(self):
         self.active_draw.rectangle(
             [0, 0, self.screen_width, self.screen_height], fill="black"
@@ -199,7 +210,7 @@ class UserInterface:
         if fill is None:
             fill = color_btn_a if self.layout_name == "nintendo" else color_btn_b
         try:
-            icon = Image.open(append_icon_path) if append_icon_path else None
+            icon = self._load_image(append_icon_path) if append_icon_path else None
         except (FileNotFoundError, AttributeError):
             icon = None
 
@@ -355,7 +366,7 @@ class UserInterface:
 
     def draw_header(self, host: str, username: str):
         username = username if len(username) <= 22 else username[:19] + "..."
-        logo = Image.open(os.path.join(os.getcwd(), "resources/romm.png"))
+        logo = self._load_image(os.path.join(self.fs.resources_path, "romm.png"))
         pos_logo = [15, 15]
         pos_text = [55, 9]
         self.active_image.paste(
@@ -379,7 +390,7 @@ class UserInterface:
         )
 
         if self.status.profile_pic_path:
-            profile_pic = Image.open(self.status.profile_pic_path)
+            profile_pic = self._load_image(self.status.profile_pic_path)
             margin_right_profile_pic = 45
             margin_top_profile_pic = 5
             pos_profile_pic = [
@@ -502,7 +513,7 @@ class UserInterface:
         self,
         saves_selected_position: int,
         max_n_saves: int,
-        saves: list["SaveData"],
+        saves: list[SaveData],
         fill: Optional[str] = None,
     ):
         if fill is None:
@@ -553,7 +564,7 @@ class UserInterface:
         self,
         states_selected_position: int,
         max_n_states: int,
-        states: list["StateSave"],
+        states: list[StateSave],
         fill: Optional[str] = None,
     ):
         if fill is None:
@@ -709,11 +720,10 @@ class UserInterface:
 
     def _human_readable_size(self, size_bytes: int) -> tuple[float, str]:
         """サイズを人間が読みやすい形式に変換"""
-        if size_bytes == 0:
+        if size_bytes <= 0:
             return 0, "B"
         size_name = ("B", "KB", "MB", "GB")
-        import math
-        i = int(math.floor(math.log(size_bytes, 1024)))
-        p = math.pow(1024, i)
-        s = round(size_bytes / p, 2)
+        # 単位ごとに2**10倍になるので、ビット長から単位を求める
+        i = min(len(size_name) - 1, (size_bytes.bit_length() - 1) // 10)
+        s = round(size_bytes / (1 << (i * 10)), 2)
         return (s, size_name[i])
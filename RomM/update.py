@@ -1,9 +1,9 @@
 import os
 import re
+import time
 from urllib.error import HTTPError, URLError
 from urllib.request import Request, urlopen
 
-import sdl2
 from filesystem import Filesystem
 from glyps import glyphs
 from semver import Version
@@ -65,7 +65,8 @@ class Update:
                 self.total_size = int(response.getheader("Content-Length", 0)) or 1
                 self.download_percent = 0.0
                 downloaded_bytes = 0
-                chunk_size = 1024
+                chunk_size = 1 << 18
+                last_draw = 0.0
 
                 with open(update_filename, "wb") as out_file:
                     while True:
@@ -77,6 +78,14 @@ class Update:
                         self.download_percent = min(
                             100.0, (downloaded_bytes / self.total_size) * 100
                         )
+                        # Redraw at most every 50 ms instead of after every chunk
+                        now = time.monotonic()
+                        if (
+                            now - last_draw < 0.05
+                            and downloaded_bytes < self.total_size
+                        ):
+                            continue
+                        last_draw = now
                         self.ui.draw_loader(self.download_percent)
                         self.ui.draw_log(
                             text_line_1="Downloading update...",
@@ -84,7 +93,6 @@ class Update:
                             background=True,
                         )
                         self.ui.render_to_screen()
-                        sdl2.SDL_Delay(16)
 
                 self.status.updating.clear()
                 return True